@@ -2,6 +2,7 @@
 Configuration module for the self-updating application.
 """
 
+import functools
 import os
 from pathlib import Path
 
@@ -14,7 +15,8 @@ class Config:
     
     # Update server configuration
     UPDATE_SERVER_URL = os.environ.get("UPDATE_SERVER_URL", "http://localhost:8000")
-    UPDATE_CHECK_ENDPOINT = "/api/version"
+    UPDATE_CHECK_ENDPOINT = "/api/check"
+    UPDATE_VERSION_ENDPOINT = "/api/version"  # Fallback for servers without /api/check
     UPDATE_DOWNLOAD_ENDPOINT = "/api/download"
     
     
@@ -28,6 +30,9 @@ class Config:
     MAX_BACKUP_COUNT = 5  # Keep last 5 versions as backups
     UPDATE_TIMEOUT = 10   # Shorter timeout for HTTP requests in seconds
     VERIFY_CHECKSUMS = True  # Whether to verify file checksums
+    CHUNK_SIZE = 1 << 20  # 1 MiB per read/write; small chunks are dominated by per-call overhead
+    PARALLEL_DOWNLOAD_THRESHOLD = 32 << 20  # Updates at least this large are downloaded as byte ranges
+    DOWNLOAD_CONNECTIONS = 4  # Concurrent range requests for large updates
     
     
     @classmethod
@@ -36,13 +41,17 @@ class Config:
         for directory in [cls.HOME_DIR, cls.BACKUP_DIR, cls.TEMP_DIR]:
             directory.mkdir(parents=True, exist_ok=True)
         
+    # The executable and version are fixed for the life of the process, so
+    # these paths are computed once rather than re-resolved on every update
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def get_current_executable(cls):
         """Get the path to the current executable"""
         import sys
         return Path(sys.argv[0]).resolve()
         
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def get_backup_path(cls):
         """Get the backup path base name for the current version"""
         return cls.BACKUP_DIR / f"{cls.APP_NAME}_v{cls.VERSION}"
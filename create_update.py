@@ -3,14 +3,26 @@
 """Simple script to increment version and create update zip"""
 
 import json
-import zipfile
+import os
 import hashlib
-import semver
 from datetime import datetime, timezone
 from pathlib import Path
 from config import Config
 
+# Files smaller than this are stored uncompressed in the update zip
+STORE_THRESHOLD = 4096
+
+def replace_symlink(link: Path, target: str):
+    """Atomically point link at target, replacing any existing file or symlink"""
+    temp_link = link.with_name(f".{link.name}.tmp")
+    temp_link.unlink(missing_ok=True)
+    temp_link.symlink_to(target)
+    os.replace(temp_link, link)
+
 def main():
+    # Deferred so importing this module stays cheap
+    import zipfile
+    
     print("NameTag Update Creator")
     print("=" * 24)
     
@@ -18,8 +30,9 @@ def main():
     current_version = Config.VERSION
     print(f"Current version: {current_version}")
     
-    # Increment patch version using semver
-    new_version = semver.bump_patch(current_version)
+    # Increment patch version
+    major, minor, patch = map(int, current_version.split('.'))
+    new_version = f"{major}.{minor}.{patch + 1}"
     print(f"New version: {new_version}")
     
     # Update version in config.py
@@ -46,15 +59,22 @@ def main():
     
     with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as zf:
         for file_name in files_to_include:
-            zf.write(file_name)
+            # Small files gain little from DEFLATE but still pay for it on build and extract
+            if Path(file_name).stat().st_size < STORE_THRESHOLD:
+                zf.write(file_name, compress_type=zipfile.ZIP_STORED)
+            else:
+                zf.write(file_name)
     
     print("[SUCCESS] Created update package")
     
     # Calculate SHA256 checksum
-    checksum = hashlib.sha256()
     with open(zip_file, 'rb') as f:
-        while chunk := f.read(4096):
-            checksum.update(chunk)
+        if hasattr(hashlib, "file_digest"):
+            checksum = hashlib.file_digest(f, "sha256")
+        else:
+            checksum = hashlib.sha256()
+            while chunk := f.read(Config.CHUNK_SIZE):
+                checksum.update(memoryview(chunk))
     
     file_size = zip_file.stat().st_size
     checksum_hex = checksum.hexdigest()
@@ -74,16 +94,10 @@ def main():
         json.dump(manifest, f)
     
     # Create/update latest manifest symlink
-    latest_manifest = updates_dir / "latest_manifest.json"
-    if latest_manifest.exists() or latest_manifest.is_symlink():
-        latest_manifest.unlink()
-    latest_manifest.symlink_to(f"manifest_v{new_version}.json")
+    replace_symlink(updates_dir / "latest_manifest.json", f"manifest_v{new_version}.json")
     
     # Create/update latest symlink
-    latest_zip = updates_dir / "latest.zip"
-    if latest_zip.exists() or latest_zip.is_symlink():
-        latest_zip.unlink()
-    latest_zip.symlink_to(f"{Config.APP_NAME}_v{new_version}.zip")
+    replace_symlink(updates_dir / "latest.zip", f"{Config.APP_NAME}_v{new_version}.zip")
     
     print()
     print("Update package created successfully!")
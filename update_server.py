@@ -6,13 +6,15 @@ This server provides version information and serves update files
 """
 
 import argparse
+import hashlib
 import os
 import json
 import logging
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, request, send_file, url_for
 from werkzeug.exceptions import NotFound, InternalServerError
 
 # Configuration constants
@@ -21,11 +23,18 @@ PORT = int(os.environ.get("PORT", "8000"))
 UPDATES_DIR = Path(__file__).parent / "updates"
 LATEST_MANIFEST_FILE = UPDATES_DIR / "latest_manifest.json"
 
+# Offload update file transfer to a fronting web server when configured:
+# ACCEL_REDIRECT_PREFIX is an nginx `internal` location mapped to UPDATES_DIR
+# (e.g. /internal-updates/); USE_X_SENDFILE enables the Apache/lighttpd header
+ACCEL_REDIRECT_PREFIX = os.environ.get("ACCEL_REDIRECT_PREFIX")
+USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
+
 # TODO: Add authentication before production deployment
 # Consider implementing: API keys, JWT tokens, rate limiting, IP whitelisting
 
 # Initialize Flask app
 app = Flask(__name__)
+app.config['USE_X_SENDFILE'] = USE_X_SENDFILE
 
 # Setup logging
 logging.basicConfig(
@@ -35,15 +44,54 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def read_latest_manifest() -> Optional[Dict[str, Any]]:
-    """Read the latest manifest file created by create_update.py"""
+# Parsed latest manifest, its pre-serialized JSON body and ETag, keyed on
+# the manifest file's (inode, mtime) so a new release invalidates it
+_manifest_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any], bytes, str]] = None
+
+
+def _read_manifest_cache() -> Optional[Tuple[Tuple[int, int], Dict[str, Any], bytes, str]]:
+    """Return the cached manifest entry, reloading it if the file has changed"""
+    global _manifest_cache
+    try:
+        st = LATEST_MANIFEST_FILE.stat()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.error(f"Error reading manifest file: {e}")
+        return None
+    
+    cache_key = (st.st_ino, st.st_mtime_ns)
+    cached = _manifest_cache
+    if cached is not None and cached[0] == cache_key:
+        return cached
+    
     try:
-        if LATEST_MANIFEST_FILE.exists():
-            with open(LATEST_MANIFEST_FILE, 'r') as f:
-                return json.load(f)
+        with open(LATEST_MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
     except Exception as e:
         logger.error(f"Error reading manifest file: {e}")
-    return None
+        return None
+    
+    body = json.dumps(manifest).encode()
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    cached = (cache_key, manifest, body, etag)
+    _manifest_cache = cached
+    return cached
+
+
+def read_latest_manifest() -> Optional[Dict[str, Any]]:
+    """Read the latest manifest file created by create_update.py"""
+    cached = _read_manifest_cache()
+    return cached[1] if cached else None
+
+
+def _is_newer_version(version: str, current_version: str) -> bool:
+    """Whether MAJOR.MINOR.PATCH version is newer than current_version"""
+    try:
+        return tuple(map(int, version.split('.'))) > tuple(map(int, current_version.split('.')))
+    except ValueError:
+        # Unparseable client version: send the manifest and let the client decide
+        return True
 
 
 def get_latest_update_file() -> Optional[Path]:
@@ -66,20 +114,61 @@ def get_latest_update_file() -> Optional[Path]:
 def get_version():
     """Get current version information from manifest file"""
     try:
-        manifest = read_latest_manifest()
+        cached = _read_manifest_cache()
         
-        if not manifest:
+        if not cached:
             logger.error("No manifest file found - run create_update.py first")
             raise NotFound("Version information not available")
         
-        logger.info(f"Served version info: {manifest['version']}")
-        return jsonify(manifest)
+        _, manifest, body, etag = cached
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        
+        # Polling clients that already have this manifest get an empty 304
+        response.make_conditional(request)
+        logger.info(f"Served version info: {manifest['version']} ({response.status_code})")
+        return response
         
     except Exception as e:
         logger.error(f"Error serving version info: {e}")
         raise InternalServerError("Error getting version info")
 
 
+@app.route('/api/check')
+def check_for_update():
+    """
+    Get the latest manifest only if it is newer than the client's version
+    
+    Clients pass their version as ?current=<version>; up-to-date clients
+    get an empty 304, saving both the body and a client-side comparison.
+    """
+    try:
+        cached = _read_manifest_cache()
+        
+        if not cached:
+            logger.error("No manifest file found - run create_update.py first")
+            raise NotFound("Version information not available")
+        
+        _, manifest, body, etag = cached
+        current_version = request.args.get('current')
+        if current_version and not _is_newer_version(manifest['version'], current_version):
+            logger.info(f"Client on {current_version} is up to date")
+            return Response(status=304)
+            
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        
+        # Announce the download so the client doesn't have to discover it
+        response.headers['Link'] = f"<{url_for('download_update')}>; rel=next"
+        response.make_conditional(request)
+        logger.info(f"Served update check: {manifest['version']} ({response.status_code})")
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error serving update check: {e}")
+        raise InternalServerError("Error checking for updates")
+
+
 @app.route('/api/download')
 def download_update():
     """Handle update file download requests"""
@@ -91,20 +180,36 @@ def download_update():
             raise NotFound("Update file not found")
             
         logger.info(f"Serving update file: {update_file.name}")
-        return send_file(update_file)
+        
+        if ACCEL_REDIRECT_PREFIX:
+            # nginx streams the file itself via sendfile(); send headers only
+            response = Response(mimetype='application/zip')
+            response.headers['X-Accel-Redirect'] = f"{ACCEL_REDIRECT_PREFIX.rstrip('/')}/{update_file.name}"
+            return response
+            
+        return send_file(update_file, conditional=True)
         
     except Exception as e:
         logger.error(f"Error serving update file: {e}")
         raise InternalServerError("Error serving update file")
 
 
+# Health responses only change once per second, so the body is rebuilt at
+# most that often no matter how frequently load balancers probe
+_HEALTH_BODY_PREFIX = b'{"status": "healthy", "timestamp": "'
+_health_cache: Tuple[int, bytes] = (-1, b"")
+
+
 @app.route('/health')
 def health_check():
     """Handle health check requests"""
-    return jsonify({
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat()
-    })
+    global _health_cache
+    second = int(time.monotonic())
+    cached_second, body = _health_cache
+    if second != cached_second:
+        body = _HEALTH_BODY_PREFIX + datetime.now().isoformat(timespec='seconds').encode() + b'"}'
+        _health_cache = (second, body)
+    return Response(body, mimetype='application/json')
 
 
 def main():
@@ -6,19 +6,82 @@ and performing atomic updates with rollback capability
 """
 
 import hashlib
+import hmac
+import os
 import shutil
-import zipfile
-import requests
+import stat
 import tempfile
 import logging
 import threading
 import time
 from pathlib import Path
-from typing import Optional, Dict, Any
-import semver
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
 
 from config import Config
 
+# requests, zipfile and concurrent.futures are imported where they are
+# used so they stay off the application's startup path
+if TYPE_CHECKING:
+    import requests
+    import zipfile
+
+
+def _parse_version(version: str) -> Tuple[int, ...]:
+    """Parse a MAJOR.MINOR.PATCH version string into a comparable tuple"""
+    return tuple(map(int, version.split('.')))
+
+
+def _link_or_copy(src, dst):
+    """Hardlink src to dst, copying instead where links are not possible"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class _DownloadWriter:
+    """
+    File-like wrapper used as the copyfileobj destination for downloads
+    
+    Hashes every chunk on its way to disk and logs progress only when both
+    half a second has passed and another 5% step has been reached, instead
+    of once per chunk.
+    """
+    
+    PROGRESS_STEP = 5.0       # Percent
+    PROGRESS_INTERVAL = 0.5   # Seconds
+    
+    def __init__(self, f, total_size: int, logger: logging.Logger):
+        self._f = f
+        self._logger = logger
+        self.total_size = total_size
+        self.downloaded = 0
+        self.sha256_hash = hashlib.sha256()
+        self._last_log_time = time.monotonic()
+        self._last_log_step = 0
+        
+        # Decided once so the hot path skips progress math when it won't be logged
+        self._report = total_size > 0 and logger.isEnabledFor(logging.INFO)
+        
+    def write(self, chunk) -> int:
+        self._f.write(chunk)
+        self.sha256_hash.update(chunk)
+        self.downloaded += len(chunk)
+        if self._report:
+            self._report_progress()
+        return len(chunk)
+        
+    def _report_progress(self):
+        now = time.monotonic()
+        if now - self._last_log_time < self.PROGRESS_INTERVAL:
+            return
+        progress = (self.downloaded / self.total_size) * 100
+        step = int(progress // self.PROGRESS_STEP)
+        if step > self._last_log_step:
+            self._last_log_step = step
+            self._last_log_time = now
+            self._logger.info("Download progress: %.1f%%", progress)
+
 
 class SelfUpdater:
     """
@@ -31,15 +94,56 @@ class SelfUpdater:
     - Backup and rollback capabilities
     """
     
+    # Range offsets and Content-Length progress must refer to the zip's own
+    # bytes, so the transport must not re-encode it
+    DOWNLOAD_HEADERS = {'Accept-Encoding': 'identity'}
+    
     def __init__(self, config: Config):
         self.config = config
         self.logger = logging.getLogger(__name__)
         self._restart_callback = None
         
+        # Files replaced by the most recent apply, relative to the app directory
+        self._applied_files: Optional[List[Path]] = None
+        
+        # Last manifest served by the update server and its ETag, so
+        # unchanged polls can be answered with an empty 304
+        self._last_etag: Optional[str] = None
+        self._last_update_info: Optional[Dict[str, Any]] = None
+        
+        # Polled endpoint; switches to UPDATE_VERSION_ENDPOINT for older servers
+        self._check_endpoint = config.UPDATE_CHECK_ENDPOINT
+        
+        # Last remote version already found not to be newer than ours. Only
+        # reached via UPDATE_VERSION_ENDPOINT: /api/check answers 304 instead
+        self._last_remote_version: Optional[str] = None
+        
+        # Created on first use, see _session
+        self._http_session: Optional["requests.Session"] = None
+        
         # Ensure required directories exist
         config.ensure_directories()
         
     
+    @property
+    def _session(self) -> "requests.Session":
+        """HTTP session reusing keep-alive connections across polls and downloads"""
+        if self._http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=max(2, self.config.DOWNLOAD_CONNECTIONS),
+                max_retries=Retry(total=3, backoff_factor=0.3)
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._http_session = session
+        return self._http_session
+        
     def _perform_update_with_info(self, update_info: Dict[str, Any]) -> bool:
         """
         Perform the update process using already-fetched update info
@@ -54,19 +158,26 @@ class SelfUpdater:
             self.logger.info("Starting update process...")
             
             # Download and verify the update
-            update_file = self._download_update(update_info)
+            update_file, verified = self._download_and_verify(update_info)
             if not update_file:
                 return False
+                
+            # Only downloads that could not be hashed in flight are re-read
+            expected_checksum = update_info.get("checksum")
+            if not verified and expected_checksum and self.config.VERIFY_CHECKSUMS:
+                self.logger.info("Verifying checksum...")
+                if not self._verify_checksum(update_file, expected_checksum):
+                    self.logger.error("Checksum verification failed")
+                    update_file.unlink()
+                    return False
 
             # Create backup of current version
             if not self._create_backup():
                 self.logger.error("Failed to create backup")
                 return False
                 
-            # Apply the update
+            # Apply the update; a failed apply leaves the application directory untouched
             if not self._apply_update(update_file):
-                self.logger.error("Failed to apply update, attempting rollback...")
-                self._rollback()
                 return False
                 
             # Clean up
@@ -84,12 +195,44 @@ class SelfUpdater:
     def _get_update_info(self) -> Optional[Dict[str, Any]]:
         """Get update information from server"""
         try:
-            response = requests.get(
-                f"{self.config.UPDATE_SERVER_URL}{self.config.UPDATE_CHECK_ENDPOINT}",
+            headers = {}
+            if self._last_etag and self._last_update_info:
+                headers['If-None-Match'] = self._last_etag
+                
+            # The server compares versions and answers 304 when we are up to date
+            response = self._session.get(
+                f"{self.config.UPDATE_SERVER_URL}{self._check_endpoint}",
+                params={'current': self.config.VERSION},
+                headers=headers,
                 timeout=self.config.UPDATE_TIMEOUT
             )
+            
+            # Servers predating /api/check only serve the full manifest; the
+            # version is then compared client-side in _check_and_update
+            if response.status_code == 404 and self._check_endpoint != self.config.UPDATE_VERSION_ENDPOINT:
+                self.logger.info(f"Server has no {self._check_endpoint}, using {self.config.UPDATE_VERSION_ENDPOINT}")
+                self._check_endpoint = self.config.UPDATE_VERSION_ENDPOINT
+                self._last_etag = None
+                self._last_update_info = None
+                return self._get_update_info()
+                
+            if response.status_code == 304:
+                # Manifest unchanged since the last poll: the 304 echoes our ETag
+                if self._last_etag and response.headers.get('ETag') == self._last_etag:
+                    return self._last_update_info
+                    
+                # Up to date: drop any manifest cached from an earlier poll so a
+                # release that was pulled is not retried forever
+                self._last_etag = None
+                self._last_update_info = None
+                self.logger.info("No updates available")
+                return None
+                
             response.raise_for_status()
-            return response.json()
+            update_info = response.json()
+            self._last_etag = response.headers.get('ETag')
+            self._last_update_info = update_info
+            return update_info
         except Exception as e:
             self.logger.error(f"Failed to get update info: {e}")
             return None
@@ -102,13 +245,14 @@ class SelfUpdater:
             
             self.logger.info(f"Creating backup: {backup_path}.zip")
             
-            # Backup the entire application directory as a zip file
+            # Backup the entire application directory as an uncompressed zip;
+            # it is only ever read back locally, so deflating it wastes CPU
             app_dir = current_executable.parent
-            shutil.make_archive(
-                backup_path,
-                'zip', 
-                app_dir
-            )
+            import zipfile
+            with zipfile.ZipFile(f"{backup_path}.zip", 'w', zipfile.ZIP_STORED) as zip_file:
+                for file_path in sorted(app_dir.rglob('*')):
+                    if file_path.is_file():
+                        zip_file.write(file_path, file_path.relative_to(app_dir))
                 
             self.logger.info("Backup created successfully")
             return True
@@ -117,8 +261,13 @@ class SelfUpdater:
             self.logger.error(f"Failed to create backup: {e}")
             return False
             
-    def _download_update(self, update_info: Dict[str, Any]) -> Optional[Path]:
-        """Download the update zip file and verify its integrity"""
+    def _download_and_verify(self, update_info: Dict[str, Any]) -> Tuple[Optional[Path], bool]:
+        """
+        Download the update zip file, verifying its checksum in flight when possible
+        
+        Returns:
+            tuple: (downloaded file or None on failure, whether the checksum was verified)
+        """
         try:
             download_url = f"{self.config.UPDATE_SERVER_URL}{self.config.UPDATE_DOWNLOAD_ENDPOINT}"
             expected_checksum = update_info.get("checksum")
@@ -128,73 +277,234 @@ class SelfUpdater:
             # Create temporary file for download
             temp_file = self.config.TEMP_DIR / f"update_{update_info['version']}.zip"
             
-            # Download with progress
-            response = requests.get(
-                download_url, 
-                stream=True,
-                timeout=self.config.UPDATE_TIMEOUT
-            )
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(temp_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            self.logger.info(f"Download progress: {progress:.1f}%")
+            # Large updates are fetched as concurrent byte ranges when the server allows it
+            range_size = None
+            if update_info.get("size", 0) >= self.config.PARALLEL_DOWNLOAD_THRESHOLD and hasattr(os, "pwrite"):
+                range_size = self._get_range_download_size(download_url)
+                
+            if range_size:
+                # Ranges arrive out of order, so there is no in-flight digest
+                self._download_ranges(download_url, temp_file, range_size)
+                actual_checksum = None
+            else:
+                actual_checksum = self._download_stream(download_url, temp_file)
                             
             # Verify checksum if provided
-            if expected_checksum and self.config.VERIFY_CHECKSUMS:
-                if not self._verify_checksum(temp_file, expected_checksum):
+            verified = False
+            if actual_checksum and expected_checksum and self.config.VERIFY_CHECKSUMS:
+                if not hmac.compare_digest(actual_checksum, expected_checksum.lower()):
                     self.logger.error("Checksum verification failed")
                     temp_file.unlink()
-                    return None
-                    
-            self.logger.info("Download completed and verified")
-            return temp_file
+                    return None, False
+                verified = True
+                
+            self.logger.info("Download completed and verified" if verified else "Download completed")
+            return temp_file, verified
             
         except Exception as e:
             self.logger.error(f"Failed to download update: {e}")
+            return None, False
+            
+    def _download_stream(self, download_url: str, temp_file: Path) -> str:
+        """Download the file in a single stream, returning its sha256 hex digest"""
+        response = self._session.get(
+            download_url, 
+            headers=self.DOWNLOAD_HEADERS,
+            stream=True,
+            timeout=self.config.UPDATE_TIMEOUT
+        )
+        response.raise_for_status()
+        
+        total_size = int(response.headers.get('content-length', 0))
+        
+        # Let urllib3 undo any transfer encoding so raw reads yield file bytes
+        response.raw.decode_content = True
+        
+        with open(temp_file, 'wb', buffering=self.config.CHUNK_SIZE) as f:
+            # Hash while streaming so the file is not re-read from disk afterwards
+            writer = _DownloadWriter(f, total_size, self.logger)
+            shutil.copyfileobj(response.raw, writer, self.config.CHUNK_SIZE)
+            
+        return writer.sha256_hash.hexdigest()
+        
+    def _get_range_download_size(self, download_url: str) -> Optional[int]:
+        """Return the download size if the server accepts byte range requests"""
+        try:
+            response = self._session.head(
+                download_url,
+                headers=self.DOWNLOAD_HEADERS,
+                timeout=self.config.UPDATE_TIMEOUT
+            )
+            response.raise_for_status()
+            if response.headers.get('Accept-Ranges') != 'bytes':
+                return None
+            return int(response.headers.get('content-length', 0)) or None
+        except Exception as e:
+            self.logger.warning(f"Range requests unavailable, using a single stream: {e}")
             return None
             
+    def _download_ranges(self, download_url: str, temp_file: Path, total_size: int):
+        """Download the file as concurrent byte ranges written in place"""
+        part_size = -(-total_size // self.config.DOWNLOAD_CONNECTIONS)
+        ranges = [(start, min(start + part_size, total_size)) for start in range(0, total_size, part_size)]
+        
+        with open(temp_file, 'wb') as f:
+            f.truncate(total_size)
+            fd = f.fileno()
+            
+            def fetch_range(byte_range):
+                start, end = byte_range
+                response = self._session.get(
+                    download_url,
+                    headers={**self.DOWNLOAD_HEADERS, 'Range': f"bytes={start}-{end - 1}"},
+                    stream=True,
+                    timeout=self.config.UPDATE_TIMEOUT
+                )
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError("Server ignored range request")
+                    
+                offset = start
+                for chunk in response.iter_content(chunk_size=self.config.CHUNK_SIZE):
+                    offset += os.pwrite(fd, chunk, offset)
+                if offset != end:
+                    raise IOError(f"Incomplete range {start}-{end - 1}")
+                    
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                list(executor.map(fetch_range, ranges))
+                
+        self.logger.info(f"Downloaded {total_size} bytes in {len(ranges)} parallel ranges")
+        
+    def _file_sha256(self, file_path: Path) -> str:
+        """Compute the sha256 hex digest of a file"""
+        with open(file_path, "rb") as f:
+            if hasattr(hashlib, "file_digest"):
+                sha256_hash = hashlib.file_digest(f, "sha256")
+            else:
+                # Pre-3.11 fallback: large reads keep per-chunk overhead low
+                sha256_hash = hashlib.sha256()
+                while chunk := f.read(self.config.CHUNK_SIZE):
+                    sha256_hash.update(memoryview(chunk))
+                    
+        return sha256_hash.hexdigest()
+        
     def _verify_checksum(self, file_path: Path, expected_checksum: str) -> bool:
         """Verify file checksum using sha256"""
         try:
-            sha256_hash = hashlib.sha256()
-            with open(file_path, "rb") as f:
-                while True:
-                    chunk = f.read(4096)
-                    if not chunk:
-                        break
-                    sha256_hash.update(chunk)
-                    
-            actual_checksum = sha256_hash.hexdigest()
-            return actual_checksum.lower() == expected_checksum.lower()
+            actual_checksum = self._file_sha256(file_path)
+            return hmac.compare_digest(actual_checksum.lower(), expected_checksum.lower())
             
         except Exception as e:
             self.logger.error(f"Error verifying checksum: {e}")
             return False
     
     def _extract_zip_to_app_dir(self, zip_file_path: Path) -> bool:
-        """Extract a zip file to the application directory"""
+        """
+        Extract a zip file into the application directory
+        
+        Entries are fully extracted into a staging directory first and then
+        moved into place with os.replace, so no file is ever half-written.
+        Only the files in the zip are touched; the live files they replace are
+        hardlinked into a sibling .<dir>.previous directory for rollback.
+        """
+        # _rollback only ever undoes the most recent apply
+        self._applied_files = None
+        
+        app_dir = self.config.get_current_executable().parent
+        staged_dir = app_dir.with_name(f".{app_dir.name}.staged")
+        previous_dir = app_dir.with_name(f".{app_dir.name}.previous")
         try:
-            current_executable = self.config.get_current_executable()
-            app_dir = current_executable.parent
-            
+            import zipfile
+            shutil.rmtree(staged_dir, ignore_errors=True)
+            staged_dir.mkdir()
             with zipfile.ZipFile(zip_file_path, 'r') as zip_file:
-                zip_file.extractall(app_dir)
+                relative_paths = self._extract_members(zip_file, staged_dir)
                 
+            # Keep the live versions of the files about to be replaced
+            shutil.rmtree(previous_dir, ignore_errors=True)
+            previous_dir.mkdir()
+            for relative_path in relative_paths:
+                live_path = app_dir / relative_path
+                if live_path.is_file():
+                    # Replaced files keep their permissions (e.g. the executable bit)
+                    os.chmod(staged_dir / relative_path, stat.S_IMODE(live_path.stat().st_mode))
+                    (previous_dir / relative_path).parent.mkdir(parents=True, exist_ok=True)
+                    _link_or_copy(live_path, previous_dir / relative_path)
+                    
+            self._commit_staged_files(staged_dir, app_dir, previous_dir, relative_paths)
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to extract {zip_file_path}: {e}")
             return False
             
+        finally:
+            shutil.rmtree(staged_dir, ignore_errors=True)
+            
+    def _extract_members(self, zip_file: "zipfile.ZipFile", target_dir: Path) -> List[Path]:
+        """
+        Extract all zip entries into target_dir
+        
+        Returns:
+            list: Paths of the extracted files, relative to target_dir
+        """
+        # Resolve targets up front, rejecting entries that would escape target_dir
+        members = []
+        for member in zip_file.infolist():
+            target_path = Path(os.path.normpath(target_dir / member.filename))
+            if not target_path.is_relative_to(target_dir):
+                raise ValueError(f"Unsafe path in archive: {member.filename}")
+            if member.is_dir():
+                target_path.mkdir(parents=True, exist_ok=True)
+            else:
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                members.append((member, target_path))
+                
+        def extract_member(item):
+            member, target_path = item
+            with zip_file.open(member) as src, \
+                    open(target_path, 'wb', buffering=self.config.CHUNK_SIZE) as dst:
+                shutil.copyfileobj(src, dst, self.config.CHUNK_SIZE)
+                
+            # Unix permissions recorded in the archive, if any
+            mode = member.external_attr >> 16
+            if mode:
+                os.chmod(target_path, stat.S_IMODE(mode))
+                
+        # zlib releases the GIL while inflating, so entries extract in parallel
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            list(executor.map(extract_member, members))
+            
+        return [target_path.relative_to(target_dir) for _, target_path in members]
+        
+    def _commit_staged_files(self, staged_dir: Path, app_dir: Path, previous_dir: Path,
+                             relative_paths: List[Path]):
+        """Move staged files into app_dir, putting the originals back if any move fails"""
+        applied = []
+        try:
+            for relative_path in relative_paths:
+                live_path = app_dir / relative_path
+                live_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(staged_dir / relative_path, live_path)
+                applied.append(relative_path)
+        except OSError:
+            self._restore_files(applied, app_dir, previous_dir)
+            raise
+            
+        self._applied_files = applied
+        
+    def _restore_files(self, relative_paths: List[Path], app_dir: Path, previous_dir: Path):
+        """Put the saved originals of relative_paths back into app_dir"""
+        for relative_path in reversed(relative_paths):
+            saved_path = previous_dir / relative_path
+            if saved_path.exists():
+                os.replace(saved_path, app_dir / relative_path)
+            else:
+                # Added by the update, there is no original to restore
+                (app_dir / relative_path).unlink(missing_ok=True)
+                
     def _apply_update(self, update_file: Path) -> bool:
         """Apply the downloaded update"""
         self.logger.info("Applying update...")
@@ -210,8 +520,28 @@ class SelfUpdater:
         """Rollback to the previous version"""
         self.logger.info("Performing rollback...")
         
-        backup_path_base = self.config.get_backup_path()
-        backup_zip_path = backup_path_base.with_suffix('.zip')
+        applied = self._applied_files
+        if not applied:
+            self.logger.info("No update files were applied, nothing to roll back")
+            return True
+            
+        try:
+            app_dir = self.config.get_current_executable().parent
+            previous_dir = app_dir.with_name(f".{app_dir.name}.previous")
+            self._restore_files(applied, app_dir, previous_dir)
+            self._applied_files = None
+            
+            self.logger.info("Rollback completed")
+            return True
+            
+        except Exception as e:
+            # Fall back to the backup zip taken before the update
+            self.logger.error(f"Failed to restore previous files: {e}")
+            return self._rollback_from_backup()
+            
+    def _rollback_from_backup(self) -> bool:
+        """Restore the application directory from the backup zip"""
+        backup_zip_path = Path(f"{self.config.get_backup_path()}.zip")
         
         if not backup_zip_path.exists():
             self.logger.error("No backup found for rollback")
@@ -239,12 +569,19 @@ class SelfUpdater:
     def _cleanup_old_backups(self):
         """Remove old backup files, keeping only the most recent ones"""
         try:
-            backups = list(self.config.BACKUP_DIR.glob(f"{self.config.APP_NAME}_v*.zip"))
-            backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+            # Filter by name straight from the directory listing; DirEntry.stat()
+            # then costs one stat() per matching backup (none extra on Windows)
+            prefix = f"{self.config.APP_NAME}_v"
+            with os.scandir(self.config.BACKUP_DIR) as entries:
+                backups = [
+                    entry for entry in entries
+                    if entry.name.startswith(prefix) and entry.name.endswith(".zip")
+                ]
+            backups.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
             
             # Remove old backups beyond the limit
             for backup in backups[self.config.MAX_BACKUP_COUNT:]:
-                backup.unlink()
+                os.unlink(backup.path)
                 self.logger.info(f"Removed old backup: {backup.name}")
                 
         except Exception as e:
@@ -286,13 +623,16 @@ class SelfUpdater:
                 self.logger.error("Invalid version response from server")
                 return
                 
-            # Compare versions using semver
+            # Nothing to compare if the server still advertises the same version
+            if remote_version == self._last_remote_version:
+                self.logger.info("No updates available")
+                return
+                
+            # Compare MAJOR.MINOR.PATCH versions numerically
             current_version = self.config.VERSION
             self.logger.info(f"Current version: {current_version}, Remote version: {remote_version}")
             
-            comparison = semver.compare(remote_version, current_version)
-            
-            if comparison > 0:
+            if _parse_version(remote_version) > _parse_version(current_version):
                 self.logger.info(f"Update available: {remote_version}")
                 if self._perform_update_with_info(update_info):
                     self.logger.info("Update completed successfully. Requesting restart...")
@@ -301,6 +641,8 @@ class SelfUpdater:
                 else:
                     self.logger.error("Update failed. Continuing with current version.")
             else:
+                # Only remember versions we don't need, so failed updates are retried
+                self._last_remote_version = remote_version
                 self.logger.info("No updates available")
                 
         except Exception as e: